@@ -0,0 +1,309 @@
+"""
+Reproducible performance benchmarks for the voting pipeline
+
+Usage:
+    python benchmarks/run.py [--ballots 1000,100000,1000000] [--output results.json]
+                             [--baseline benchmarks/baseline.json] [--save-baseline]
+
+For each ballot count the suite creates polls, submits ballots through the
+Flask test client (up to --api-ballots, topping up with synthetic ballots
+written straight to the chain), mines blocks, verifies receipts, reads chain
+stats, tallies with close_poll and cold-loads the chain. Each ballot count runs
+in a fresh worker process and data directory, so chain size and peak RSS are
+not carried over between sizes. A real local server is then started to
+measure /api/vote and /api/blockchain/stats over HTTP.
+
+Closing a poll decrypts every ballot with PBKDF2, so tallying 1M ballots
+takes hours; pick sizes accordingly.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import resource
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.request
+from typing import List, Dict, Any, Callable, Optional
+
+from benchmarks.synthetic import BallotFactory, poll_payloads, voter_identifiers
+from benchmarks.user_import import generate_users
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, 'benchmarks', 'baseline.json')
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (one size per process)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    rank = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Collects per-operation latencies for named scenarios"""
+
+    def __init__(self):
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def measure(self, name: str, operations: int, fn: Callable[[int], Any]):
+        """Run fn(i) for each operation, timing each call"""
+        latencies = []
+        started = time.perf_counter()
+        for i in range(operations):
+            op_started = time.perf_counter()
+            fn(i)
+            latencies.append(time.perf_counter() - op_started)
+        self.record(name, latencies, time.perf_counter() - started)
+
+    def record(self, name: str, latencies: List[float], seconds: float):
+        latencies = sorted(latencies)
+        self.results[name] = {
+            'operations': len(latencies),
+            'seconds': round(seconds, 4),
+            'throughput_per_sec': round(len(latencies) / seconds, 2) if seconds > 0 else None,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        print(f"  {name:<32} {len(latencies):>8} ops  {self.results[name]['throughput_per_sec']} ops/s  "
+              f"p95 {self.results[name]['p95_ms']} ms", file=sys.stderr)
+
+
+def check(response, status: int):
+    if response.status_code != status:
+        raise RuntimeError(f"Unexpected {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response.get_json()
+
+
+def run_app_scenarios(recorder: Recorder, ballots: int, api_ballots: int, verify_samples: int, polls: int):
+    """Drive the app in-process through the test client"""
+    from src.main import app
+    from src.blockchain import Blockchain
+    from src.routes.voting import blockchain, poll_store
+
+    client = app.test_client()
+    prefix = f'{ballots}'
+
+    payloads = list(poll_payloads(polls))
+    created = []
+    recorder.measure(f'{prefix}/create_poll', len(payloads),
+                     lambda i: created.append(check(client.post('/api/polls', json=payloads[i]), 201)['poll']))
+    poll = poll_store.get_poll(created[0]['poll_id'])
+
+    # Ballots through the API (includes PBKDF2 encryption and mining every 10 votes)
+    receipts = []
+    through_api = min(ballots, api_ballots)
+    voters = list(voter_identifiers(through_api))
+    recorder.measure(f'{prefix}/api_vote', through_api, lambda i: receipts.append(check(client.post('/api/vote', json={
+        'poll_id': poll.poll_id,
+        'voter_identifier': voters[i],
+        'vote_choice': poll.options[i % len(poll.options)]
+    }), 201)['receipt']))
+
+    # Top up with synthetic ballots, mined in blocks of 10 like /api/vote does but
+    # saved once at the end: a save per block would rewrite the chain file every time
+    remaining = ballots - through_api
+    if remaining:
+        factory = BallotFactory(poll.poll_id, poll.public_key, poll.options)
+        latencies = []
+        started = time.perf_counter()
+        for ballot in factory.ballots(remaining, offset=through_api):
+            op_started = time.perf_counter()
+            blockchain.add_vote(poll.poll_id, ballot)
+            if len(blockchain.pending_votes[poll.poll_id]) >= 10:
+                blockchain.mine_pending_votes(poll.poll_id, save=False)
+            latencies.append(time.perf_counter() - op_started)
+        blockchain.mine_pending_votes(poll.poll_id, save=False)
+        recorder.record(f'{prefix}/synthetic_ingest', latencies, time.perf_counter() - started)
+        recorder.measure(f'{prefix}/save_chain', 1, lambda i: blockchain.save_chain())
+
+    factory = BallotFactory(poll.poll_id, poll.public_key, poll.options, pool_size=1, seed=1)
+    extra = list(factory.ballots(10 * 20, offset=ballots))
+
+    def mine(i):
+        for ballot in extra[i * 10:(i + 1) * 10]:
+            blockchain.add_vote(poll.poll_id, ballot)
+        blockchain.mine_pending_votes(poll.poll_id)
+    recorder.measure(f'{prefix}/mine_block', 20, mine)
+
+    samples = receipts[:verify_samples] or ['']
+    recorder.measure(f'{prefix}/api_verify', len(samples), lambda i: check(client.post('/api/verify', json={
+        'receipt': samples[i], 'poll_id': poll.poll_id
+    }), 200))
+
+    recorder.measure(f'{prefix}/api_blockchain_stats', 5, lambda i: check(client.get('/api/blockchain/stats'), 200))
+
+    recorder.measure(f'{prefix}/close_poll_tally', 1,
+                     lambda i: check(client.post(f'/api/polls/{poll.poll_id}/close'), 200))
+
+    recorder.measure(f'{prefix}/cold_load_chain', 3, lambda i: Blockchain(blockchain.chain_file))
+
+    # Offset by ballot count so each size imports fresh rows
+    body = b''.join(generate_users(min(ballots, 100000), 'ndjson', offset=ballots * 10))
+    recorder.measure(f'{prefix}/user_import', 1, lambda i: check(client.post(
+        '/api/users/import', data=body, content_type='application/x-ndjson'), 200))
+
+
+def run_size(ballots: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one ballot count in a fresh worker process and data directory"""
+    workdir = tempfile.mkdtemp(prefix=f'votechain-bench-{ballots}-')
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               CHAIN_FILE=os.path.join(workdir, 'blockchain.json'),
+               POLLS_FILE=os.path.join(workdir, 'polls.json'))
+    command = [sys.executable, os.path.abspath(__file__), '--worker-size', str(ballots),
+               '--api-ballots', str(args.api_ballots), '--verify-samples', str(args.verify_samples),
+               '--polls', str(args.polls)]
+    # Progress goes to stderr, the worker's results to stdout
+    completed = subprocess.run(command, cwd=workdir, env=env, stdout=subprocess.PIPE, check=True)
+    return json.loads(completed.stdout.decode('utf-8'))
+
+
+def run_worker(ballots: int, args: argparse.Namespace) -> int:
+    """Worker mode: run the app scenarios for one size and print them as JSON"""
+    recorder = Recorder()
+    run_app_scenarios(recorder, ballots, args.api_ballots, args.verify_samples, args.polls)
+    print(json.dumps({'scenarios': recorder.results, 'peak_rss_mb': peak_rss_mb()}))
+    return 0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def http_json(url: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def run_server_scenarios(recorder: Recorder, workdir: str, http_ballots: int):
+    """Measure latency against a real local server process"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), FLASK_ENV='production')
+    server = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, 'src', 'main.py')],
+                              cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    try:
+        for _ in range(100):
+            try:
+                http_json(f'{base}/api/blockchain/stats')
+                break
+            except OSError:
+                time.sleep(0.1)
+        poll = http_json(f'{base}/api/polls', next(poll_payloads(1, seed=2)))['poll']
+        voters = list(voter_identifiers(http_ballots, offset=10 ** 9))
+        recorder.measure('http/api_vote', http_ballots, lambda i: http_json(f'{base}/api/vote', {
+            'poll_id': poll['poll_id'],
+            'voter_identifier': voters[i],
+            'vote_choice': poll['options'][i % len(poll['options'])]
+        }))
+        recorder.measure('http/api_blockchain_stats', 20, lambda i: http_json(f'{base}/api/blockchain/stats'))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """List scenarios whose p95 latency or throughput regressed beyond tolerance"""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        if current['p95_ms'] and previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append({'scenario': name, 'metric': 'p95_ms',
+                                'baseline': previous['p95_ms'], 'current': current['p95_ms']})
+        if (current['throughput_per_sec'] and previous['throughput_per_sec']
+                and current['throughput_per_sec'] < previous['throughput_per_sec'] * (1 - tolerance)):
+            regressions.append({'scenario': name, 'metric': 'throughput_per_sec',
+                                'baseline': previous['throughput_per_sec'], 'current': current['throughput_per_sec']})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the voting pipeline')
+    parser.add_argument('--ballots', default='1000', help='comma separated ballot counts, e.g. 1000,100000,1000000')
+    parser.add_argument('--api-ballots', type=int, default=1000, help='ballots per size submitted through /api/vote')
+    parser.add_argument('--http-ballots', type=int, default=100, help='ballots submitted to the real server')
+    parser.add_argument('--verify-samples', type=int, default=50)
+    parser.add_argument('--polls', type=int, default=100, help='polls created per size')
+    parser.add_argument('--no-server', action='store_true', help='skip the real local server scenarios')
+    parser.add_argument('--output', default=None, help='write results JSON here (default: stdout)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed regression ratio')
+    parser.add_argument('--worker-size', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker_size is not None:
+        return run_worker(args.worker_size, args)
+
+    recorder = Recorder()
+    size_peak_rss = {}
+    for ballots in [int(size) for size in args.ballots.split(',')]:
+        print(f"{ballots} ballots", file=sys.stderr)
+        worker = run_size(ballots, args)
+        recorder.results.update(worker['scenarios'])
+        size_peak_rss[str(ballots)] = worker['peak_rss_mb']
+    if not args.no_server:
+        print("local server", file=sys.stderr)
+        server_dir = tempfile.mkdtemp(prefix='votechain-bench-server-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(server_dir, 'bench.db')}"
+        os.environ['CHAIN_FILE'] = os.path.join(server_dir, 'blockchain.json')
+        os.environ['POLLS_FILE'] = os.path.join(server_dir, 'polls.json')
+        run_server_scenarios(recorder, server_dir, args.http_ballots)
+
+    results = {
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        # Per size worker; 'runner' covers the HTTP client side of the server scenarios
+        'peak_rss_mb': dict(size_peak_rss, runner=peak_rss_mb()),
+        'scenarios': recorder.results
+    }
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results['baseline'] = args.baseline
+        results['regressions'] = regressions
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(output)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['scenario']} {regression['metric']}: "
+              f"{regression['baseline']} -> {regression['current']}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Synthetic data generators for the benchmark suite
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import time
+from typing import List, Dict, Any, Iterator
+
+from src.crypto_utils import VoteCrypto
+
+POLL_TEMPLATES = [
+    ('en', 'Infrastructure vote {n}', 'Should the region invest in project {n}?'),
+    ('fr', 'Référendum local {n}', "Faut-il approuver l'initiative {n} ?"),
+    ('ar', 'استفتاء رقم {n}', 'هل توافق على المشروع رقم {n}؟'),
+]
+
+
+def poll_payloads(count: int, options: int = 3, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield create-poll request bodies in rotating languages"""
+    rng = random.Random(seed)
+    for n in range(count):
+        language, title, question = POLL_TEMPLATES[n % len(POLL_TEMPLATES)]
+        yield {
+            'title': title.format(n=n),
+            'question': question.format(n=n),
+            'options': [f'Option {i + 1}' for i in range(options)],
+            'creator': f'creator{rng.randrange(50)}',
+            'duration_hours': 24,
+            'language': language
+        }
+
+
+def voter_identifiers(count: int, offset: int = 0) -> Iterator[str]:
+    """Yield unique voter identifiers"""
+    for i in range(offset, offset + count):
+        yield f'voter{i}@example.ma'
+
+
+class BallotFactory:
+    """
+    Builds signed ballots for a poll without paying PBKDF2 per ballot.
+
+    A small pool of real ciphertexts is encrypted up front and reused, so the
+    generated ballots still decrypt to valid choices when the poll is tallied.
+    """
+
+    def __init__(self, poll_id: str, public_key: str, options: List[str], pool_size: int = 4, seed: int = 0):
+        self.poll_id = poll_id
+        self.rng = random.Random(seed)
+        self.pool = [
+            (option, VoteCrypto.encrypt_vote(option, public_key))
+            for option in options
+            for _ in range(pool_size)
+        ]
+
+    def ballot(self, voter_identifier: str) -> Dict[str, Any]:
+        """Build one signed ballot as /api/vote would record it"""
+        _, encrypted_vote = self.rng.choice(self.pool)
+        voter_token = VoteCrypto.generate_voter_token(voter_identifier, self.poll_id)
+        vote_data = {
+            'poll_id': self.poll_id,
+            'encrypted_vote': encrypted_vote,
+            'timestamp': time.time(),
+            'voter_token_hash': voter_token[:16]
+        }
+        vote_data['signature'] = VoteCrypto.sign_vote(vote_data, voter_token)
+        return vote_data
+
+    def ballots(self, count: int, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        for voter_identifier in voter_identifiers(count, offset):
+            yield self.ballot(voter_identifier)
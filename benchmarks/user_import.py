@@ -0,0 +1,82 @@
+"""
+Benchmark bulk voter-roll import into the User table
+
+Usage:
+    python benchmarks/user_import.py [--rows 100000] [--batch-size 500] [--format ndjson|csv]
+
+Runs against a throwaway SQLite database and data files in a temporary
+directory, so the application's own database is never touched.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import tempfile
+import time
+
+
+def generate_users(rows: int, export_format: str, duplicate_every: int = 0, offset: int = 0):
+    """Yield a synthetic voter roll as NDJSON or CSV lines"""
+    if export_format == 'csv':
+        yield b'username,email\n'
+    for i in range(offset, offset + rows):
+        n = i - 1 if duplicate_every and i > offset and i % duplicate_every == 0 else i
+        if export_format == 'csv':
+            yield f'voter{n},voter{n}@example.ma\n'.encode('utf-8')
+        else:
+            yield (json.dumps({'username': f'voter{n}', 'email': f'voter{n}@example.ma'}) + '\n').encode('utf-8')
+
+
+def run(rows: int, batch_size: int, export_format: str, duplicate_every: int):
+    workdir = tempfile.mkdtemp(prefix='votechain-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['CHAIN_FILE'] = os.path.join(workdir, 'blockchain.json')
+    os.environ['POLLS_FILE'] = os.path.join(workdir, 'polls.json')
+
+    from src.main import app
+    client = app.test_client()
+
+    body = b''.join(generate_users(rows, export_format, duplicate_every))
+    content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+
+    started = time.perf_counter()
+    response = client.post(f'/api/users/import?batch_size={batch_size}', data=body, content_type=content_type)
+    import_seconds = time.perf_counter() - started
+    report = response.get_json()
+
+    # Walk the whole roll with keyset pagination
+    started = time.perf_counter()
+    listed, after = 0, 0
+    while after is not None:
+        page = client.get(f'/api/users?after={after}&limit=1000&fields=id,username').get_json()
+        listed += len(page['users'])
+        after = page['next_after']
+    list_seconds = time.perf_counter() - started
+
+    return {
+        'rows': rows,
+        'format': export_format,
+        'batch_size': batch_size,
+        'imported': report['imported'],
+        'duplicates': report['duplicates'],
+        'import_seconds': round(import_seconds, 3),
+        'import_rows_per_sec': round(report['imported'] / import_seconds, 1),
+        'listed': listed,
+        'list_rows_per_sec': round(listed / list_seconds, 1) if list_seconds > 0 else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk user import')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--duplicate-every', type=int, default=100, help='repeat a row every N rows (0 disables)')
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.batch_size, args.format, args.duplicate_every), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Standalone parallel audit of the stored blockchain
+
+Usage:
+    python src/audit.py [blockchain.json] [--workers N] [--receipts FILE] [--json]
+
+Re-verifies every block (hash integrity, chain linkage, recorded difficulty and
+proof-of-work) and the structure of every recorded vote across a process pool,
+reporting every failing height instead of stopping at the first one.
+"""
+import os
+import sys
+# Allow running as a script from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import base64
+import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from src.blockchain import Block, RETARGET_INTERVAL, difficulty_error, load_archive, votes_digest
+from src.crypto_utils import VoteCrypto
+
+HEX64 = re.compile(r'^[0-9a-f]{64}$')
+HEX16 = re.compile(r'^[0-9a-f]{16}$')
+VOTE_FIELDS = ('poll_id', 'encrypted_vote', 'timestamp', 'voter_token_hash', 'signature')
+
+
+def check_vote(vote: Dict[str, Any], poll_id: str) -> List[str]:
+    """Structural checks on a single recorded vote"""
+    missing = [field for field in VOTE_FIELDS if field not in vote]
+    if missing:
+        return [f"missing fields: {', '.join(missing)}"]
+
+    errors = []
+    if vote['poll_id'] != poll_id:
+        errors.append(f"vote poll_id {vote['poll_id']} does not match block poll_id {poll_id}")
+    if not HEX64.match(str(vote['signature'])):
+        errors.append("malformed signature")
+    if not HEX16.match(str(vote['voter_token_hash'])):
+        errors.append("malformed voter_token_hash")
+    try:
+        encrypted = json.loads(vote['encrypted_vote'])
+        base64.b64decode(encrypted['salt'], validate=True)
+        base64.b64decode(encrypted['ciphertext'], validate=True)
+        int(encrypted['length'])
+    except Exception:
+        errors.append("malformed encrypted_vote")
+    return errors
+
+
+def audit_range(task: Tuple[int, List[Dict[str, Any]], List[Dict[str, Any]], Set[str], str]) -> Dict[str, Any]:
+    """
+    Audit a contiguous range of blocks.
+
+    The task carries the blocks preceding the range (one difficulty retarget
+    window) so linkage and the difficulty rule can be checked at the range
+    boundary without the rest of the chain. Archived vote bodies are read back
+    from archive files relative to chain_dir.
+    """
+    start, blocks, preceding, wanted_receipts, chain_dir = task
+    archive_path, archive = None, {}
+    failures = []
+    found_receipts = []
+    vote_count = 0
+    try:
+        window = [Block.from_dict(block_data) for block_data in preceding]
+    except (KeyError, TypeError):
+        window = []
+
+    for offset, block_data in enumerate(blocks):
+        height = start + offset
+        errors = []
+        try:
+            block = Block.from_dict(block_data)
+        except (KeyError, TypeError) as e:
+            failures.append({'height': height, 'errors': [f"unreadable block: {e}"]})
+            window = []
+            continue
+
+        if block.index != height:
+            errors.append(f"index {block.index} does not match height {height}")
+
+        votes = block.votes
+        if block.archive is not None:
+            path = os.path.join(chain_dir, block.archive['file'])
+            try:
+                if path != archive_path:
+                    archive_path, archive = path, load_archive(path)
+                votes = archive[block.index]
+            except (ValueError, KeyError) as e:
+                errors.append(f"archived votes unavailable: {e}")
+                votes = None
+            if votes is not None and votes_digest(votes) != block.archive['votes_sha256']:
+                errors.append("archived votes do not match digest")
+            if votes is not None and block.archive.get('vote_count') != len(votes):
+                errors.append(f"archived vote_count {block.archive.get('vote_count')} does not match the {len(votes)} votes")
+
+        if block.votes_sha256 is not None:
+            # The hash commits to the votes digest, so the header is checked on its own
+            if block.hash != block.calculate_hash():
+                errors.append("hash mismatch")
+            if votes is not None and votes_digest(votes) != block.votes_sha256:
+                errors.append("votes do not match the committed digest")
+        elif votes is not None and block.hash != block.calculate_hash(votes):
+            errors.append("hash mismatch")
+        if votes is not None and block.vote_total is not None and len(votes) != block.vote_total:
+            errors.append(f"vote_total {block.vote_total} does not match the {len(votes)} votes")
+
+        # The genesis block has no predecessor and is not re-checked by is_chain_valid
+        if height > 0:
+            if not window:
+                errors.append("previous block unreadable, linkage and difficulty not checked")
+            else:
+                if block.previous_hash != window[-1].hash:
+                    errors.append("broken linkage to previous block")
+                error = difficulty_error(block, window)
+                if error:
+                    errors.append(error)
+
+        for position, vote in enumerate(votes or []):
+            vote_count += 1
+            if not isinstance(vote, dict):
+                errors.append(f"vote {position}: not an object")
+                continue
+            errors.extend(f"vote {position}: {error}" for error in check_vote(vote, block.poll_id))
+            if wanted_receipts:
+                digest = VoteCrypto.ballot_hash(vote)
+                if digest in wanted_receipts:
+                    found_receipts.append(digest)
+
+        if errors:
+            failures.append({'height': height, 'hash': block.hash, 'errors': errors})
+        window = (window + [block])[-RETARGET_INTERVAL:]
+
+    return {
+        'start': start,
+        'blocks': len(blocks),
+        'votes': vote_count,
+        'failures': failures,
+        'found_receipts': found_receipts
+    }
+
+
+def load_receipts(receipts_file: str) -> Dict[str, str]:
+    """Load receipts (one per line) and map their vote hash to the receipt"""
+    receipts = {}
+    with open(receipts_file, 'r') as f:
+        for line in f:
+            receipt = line.strip()
+            if not receipt:
+                continue
+            try:
+                receipt_data = json.loads(base64.b64decode(receipt).decode('utf-8'))
+                receipts[receipt_data['vote_hash']] = receipt
+            except Exception:
+                receipts[f"invalid:{receipt}"] = receipt
+    return receipts
+
+
+def audit_chain(chain_file: str, workers: Optional[int] = None,
+                receipts_file: Optional[str] = None, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Audit a stored chain file across a process pool"""
+    load_started = time.perf_counter()
+    with open(chain_file, 'r') as f:
+        chain = json.load(f)
+    load_seconds = time.perf_counter() - load_started
+
+    receipts = load_receipts(receipts_file) if receipts_file else {}
+    wanted = {digest for digest in receipts if not digest.startswith('invalid:')}
+
+    chain_dir = os.path.dirname(os.path.abspath(chain_file))
+    workers = workers or os.cpu_count() or 1
+    if not chunk_size:
+        chunk_size = max(1, -(-len(chain) // (workers * 4)))
+
+    tasks = []
+    for start in range(0, len(chain), chunk_size):
+        preceding = chain[max(0, start - RETARGET_INTERVAL):start]
+        tasks.append((start, chain[start:start + chunk_size], preceding, wanted, chain_dir))
+
+    verify_started = time.perf_counter()
+    if workers == 1:
+        results = [audit_range(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(audit_range, tasks))
+    verify_seconds = time.perf_counter() - verify_started
+
+    failures = [failure for result in results for failure in result['failures']]
+    found = {digest for result in results for digest in result['found_receipts']}
+    total_votes = sum(result['votes'] for result in results)
+
+    return {
+        'chain_file': chain_file,
+        'total_blocks': len(chain),
+        'total_votes': total_votes,
+        'workers': workers,
+        'ranges': len(tasks),
+        'is_valid': not failures,
+        'failures': failures,
+        'receipts': {
+            'checked': len(receipts),
+            'found': len(found),
+            'missing': [receipt for digest, receipt in receipts.items() if digest not in found]
+        },
+        'load_seconds': round(load_seconds, 4),
+        'verify_seconds': round(verify_seconds, 4),
+        'blocks_per_sec': round(len(chain) / verify_seconds, 1) if verify_seconds > 0 else None
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """Print a human readable audit report"""
+    print(f"Chain file:   {report['chain_file']}")
+    print(f"Blocks:       {report['total_blocks']} ({report['total_votes']} votes)")
+    print(f"Workers:      {report['workers']} over {report['ranges']} ranges")
+    print(f"Throughput:   {report['blocks_per_sec']} blocks/sec "
+          f"(verify {report['verify_seconds']}s, load {report['load_seconds']}s)")
+    if report['receipts']['checked']:
+        print(f"Receipts:     {report['receipts']['found']}/{report['receipts']['checked']} found on chain")
+        for receipt in report['receipts']['missing']:
+            print(f"  missing receipt: {receipt}")
+
+    if report['is_valid']:
+        print("Result:       VALID")
+        return
+
+    print(f"Result:       INVALID ({len(report['failures'])} failing blocks)")
+    for failure in report['failures']:
+        print(f"  height {failure['height']}:")
+        for error in failure['errors']:
+            print(f"    - {error}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Audit the VoteChain blockchain file')
+    parser.add_argument('chain_file', nargs='?', default='blockchain.json')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=None, help='blocks per range')
+    parser.add_argument('--receipts', default=None, help='file with one voter receipt per line')
+    parser.add_argument('--json', action='store_true', help='emit the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = audit_chain(
+        args.chain_file,
+        workers=args.workers,
+        receipts_file=args.receipts,
+        chunk_size=args.chunk_size
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    receipts_ok = not report['receipts']['missing']
+    return 0 if report['is_valid'] and receipts_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,48 +1,121 @@
 """
 Blockchain implementation for secure voting system
 """
+from collections import OrderedDict
+import gzip
 import hashlib
 import json
+import os
 import time
-from typing import List, Dict, Any, Optional
+import zlib
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from datetime import datetime
 
+from src.metrics import MINE_BLOCK_SECONDS, SAVE_CHAIN_SECONDS, CHAIN_VALIDATION_SECONDS
+
+
+# Blocks written before adaptive difficulty carry no difficulty field
+LEGACY_DIFFICULTY = 2
+MIN_DIFFICULTY = 1
+MAX_DIFFICULTY = 6
+# Difficulty only changes every RETARGET_INTERVAL blocks
+RETARGET_INTERVAL = 10
+DEFAULT_TARGET_SEAL_MS = 200.0
+# Decoded archive files kept in memory for repeated retrieval
+ARCHIVE_CACHE_SIZE = 4
+
+
+def votes_digest(votes: List[Dict]) -> str:
+    """SHA-256 digest of a block's vote list"""
+    return hashlib.sha256(json.dumps(votes, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_archive(path: str) -> Dict[int, List[Dict]]:
+    """Read an archive file, mapping block index to its votes (ValueError if unreadable)"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        return {block["index"]: block["votes"] for block in data["blocks"]}
+    except (OSError, EOFError, zlib.error, ValueError, KeyError, TypeError) as e:
+        # Missing, truncated, corrupt or malformed archives all surface the same way
+        raise ValueError(f"Archive {path} is unreadable: {e!r}") from e
+
 
 class Block:
     """Represents a single block in the blockchain"""
     
     def __init__(self, index: int, timestamp: float, votes: List[Dict], 
-                 previous_hash: str, poll_id: str):
+                 previous_hash: str, poll_id: str, difficulty: Optional[int] = None,
+                 target_ms: Optional[float] = None, parent_seal_ms: Optional[float] = None,
+                 votes_sha256: Optional[str] = None, vote_total: Optional[int] = None):
         self.index = index
         self.timestamp = timestamp
         self.votes = votes
         self.previous_hash = previous_hash
         self.poll_id = poll_id
+        self.difficulty = difficulty
+        self.target_ms = target_ms
+        self.seal_ms: Optional[float] = None
+        # The parent's seal time, committed here so the adjustment rule only reads hashed data
+        self.parent_seal_ms = parent_seal_ms
+        # When set, the hash commits to this digest instead of the raw votes, so
+        # the header can be re-hashed after the votes are archived
+        self.votes_sha256 = votes_sha256
+        # Number of votes, hashed alongside the digest so archived counts are committed too
+        self.vote_total = vote_total
+        # Set once the vote bodies have moved to an archive file
+        self.archive: Optional[Dict[str, Any]] = None
         self.nonce = 0
         self.hash = self.calculate_hash()
     
-    def calculate_hash(self) -> str:
-        """Calculate SHA-256 hash of the block"""
-        block_string = json.dumps({
+    def calculate_hash(self, votes: Optional[List[Dict]] = None) -> str:
+        """Calculate SHA-256 hash of the block (pass votes for an archived legacy block)"""
+        block_data = {
             "index": self.index,
             "timestamp": self.timestamp,
-            "votes": self.votes,
             "previous_hash": self.previous_hash,
             "poll_id": self.poll_id,
             "nonce": self.nonce
-        }, sort_keys=True)
+        }
+        # Legacy blocks were hashed over the raw vote list
+        if self.votes_sha256 is not None:
+            block_data["votes_sha256"] = self.votes_sha256
+            if self.vote_total is not None:
+                block_data["vote_total"] = self.vote_total
+        else:
+            block_data["votes"] = self.votes if votes is None else votes
+        # Legacy blocks were hashed without difficulty fields
+        if self.difficulty is not None:
+            block_data["difficulty"] = self.difficulty
+            block_data["target_ms"] = self.target_ms
+        if self.parent_seal_ms is not None:
+            block_data["parent_seal_ms"] = self.parent_seal_ms
+        block_string = json.dumps(block_data, sort_keys=True)
         return hashlib.sha256(block_string.encode()).hexdigest()
     
+    def hash_matches(self, votes: Optional[List[Dict]] = None) -> bool:
+        """Check the block hash, and the votes digest it commits to, against the votes"""
+        votes = self.votes if votes is None else votes
+        if self.vote_total is not None and len(votes) != self.vote_total:
+            return False
+        if self.votes_sha256 is not None:
+            return votes_digest(votes) == self.votes_sha256 and self.hash == self.calculate_hash()
+        return self.hash == self.calculate_hash(votes)
+    
     def mine_block(self, difficulty: int = 2):
-        """Simple proof-of-work mining"""
+        """Simple proof-of-work mining, recording how long the seal took"""
         target = "0" * difficulty
+        started = time.perf_counter()
         while self.hash[:difficulty] != target:
             self.nonce += 1
             self.hash = self.calculate_hash()
+        elapsed = time.perf_counter() - started
+        self.seal_ms = round(elapsed * 1000, 3)
+        MINE_BLOCK_SECONDS.observe(elapsed)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert block to dictionary"""
-        return {
+        data = {
             "index": self.index,
             "timestamp": self.timestamp,
             "votes": self.votes,
@@ -51,6 +124,25 @@ class Block:
             "nonce": self.nonce,
             "hash": self.hash
         }
+        if self.difficulty is not None:
+            data["difficulty"] = self.difficulty
+            data["target_ms"] = self.target_ms
+            data["seal_ms"] = self.seal_ms
+        if self.parent_seal_ms is not None:
+            data["parent_seal_ms"] = self.parent_seal_ms
+        if self.votes_sha256 is not None:
+            data["votes_sha256"] = self.votes_sha256
+        if self.vote_total is not None:
+            data["vote_total"] = self.vote_total
+        if self.archive is not None:
+            data["archive"] = self.archive
+        return data
+    
+    def vote_count(self) -> int:
+        """Number of votes in the block, archived or not (the committed total when present)"""
+        if self.vote_total is not None:
+            return self.vote_total
+        return self.archive["vote_count"] if self.archive is not None else len(self.votes)
     
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'Block':
@@ -60,21 +152,90 @@ class Block:
             timestamp=data["timestamp"],
             votes=data["votes"],
             previous_hash=data["previous_hash"],
-            poll_id=data["poll_id"]
+            poll_id=data["poll_id"],
+            difficulty=data.get("difficulty"),
+            target_ms=data.get("target_ms"),
+            parent_seal_ms=data.get("parent_seal_ms"),
+            votes_sha256=data.get("votes_sha256"),
+            vote_total=data.get("vote_total")
         )
+        block.seal_ms = data.get("seal_ms")
+        block.archive = data.get("archive")
         block.nonce = data["nonce"]
         block.hash = data["hash"]
         return block
 
 
+def required_difficulty(previous_blocks: List[Block], target_ms: float, committed: bool = True) -> int:
+    """
+    Difficulty the adjustment rule assigns to the block after previous_blocks.
+    
+    previous_blocks must end with the parent block and hold at least the last
+    RETARGET_INTERVAL blocks of the chain (or all of them if shorter). At each
+    retarget height the average seal time of the previous interval is compared
+    with the target: one step harder costs ~16x the hashes, so difficulty only
+    rises when that would still land under the target.
+    
+    Seal times are read from each block's hashed parent_seal_ms, so the interval
+    lags one block behind. committed=False reproduces the rule for blocks mined
+    before seal times were committed, which read the unhashed seal_ms.
+    """
+    parent = previous_blocks[-1]
+    current = parent.difficulty if parent.difficulty is not None else LEGACY_DIFFICULTY
+    if (parent.index + 1) % RETARGET_INTERVAL != 0:
+        return current
+    
+    window = previous_blocks[-RETARGET_INTERVAL:]
+    if committed:
+        samples = [block.parent_seal_ms for block in window if block.parent_seal_ms is not None]
+    else:
+        samples = [block.seal_ms for block in window if block.seal_ms is not None]
+    if not samples:
+        return current
+    
+    average_ms = sum(samples) / len(samples)
+    if average_ms > target_ms:
+        current -= 1
+    elif average_ms * 16 <= target_ms:
+        current += 1
+    return max(MIN_DIFFICULTY, min(MAX_DIFFICULTY, current))
+
+
+def difficulty_error(block: Block, previous_blocks: List[Block]) -> Optional[str]:
+    """Check a block's recorded difficulty and proof-of-work, returning the problem if any"""
+    parent = previous_blocks[-1]
+    if block.difficulty is None:
+        if parent.difficulty is not None:
+            return "legacy block without difficulty after adaptive blocks"
+        required = LEGACY_DIFFICULTY
+    else:
+        if block.target_ms is None:
+            return "missing target_ms"
+        if block.parent_seal_ms is None and parent.parent_seal_ms is not None:
+            return "block without parent_seal_ms after blocks that commit seal times"
+        required = required_difficulty(previous_blocks, block.target_ms,
+                                       committed=block.parent_seal_ms is not None)
+        if block.difficulty != required:
+            return f"difficulty {block.difficulty} does not follow the adjustment rule (expected {required})"
+    
+    if not block.hash.startswith("0" * required):
+        return f"insufficient proof-of-work (difficulty {required})"
+    return None
+
+
 class Blockchain:
     """Blockchain for storing encrypted votes"""
     
-    def __init__(self, chain_file: str = "blockchain.json"):
+    def __init__(self, chain_file: str = "blockchain.json",
+                 target_seal_ms: float = DEFAULT_TARGET_SEAL_MS,
+                 archive_dir: Optional[str] = None):
         self.chain_file = chain_file
         self.chain: List[Block] = []
         self.pending_votes: Dict[str, List[Dict]] = {}  # poll_id -> votes
-        self.difficulty = 2
+        self.target_seal_ms = target_seal_ms
+        self.archive_dir = archive_dir  # enables archive_poll when set
+        self._archive_cache: "OrderedDict[str, Dict[int, List[Dict]]]" = OrderedDict()
+        self.difficulty = LEGACY_DIFFICULTY  # difficulty of the next block
         self.load_chain()
     
     def load_chain(self):
@@ -85,14 +246,21 @@ class Blockchain:
                 self.chain = [Block.from_dict(block_data) for block_data in data]
         except (FileNotFoundError, json.JSONDecodeError):
             # Create genesis block
-            genesis_block = Block(0, time.time(), [], "0", "genesis")
-            genesis_block.mine_block(self.difficulty)
+            genesis_block = Block(0, time.time(), [], "0", "genesis",
+                                  difficulty=LEGACY_DIFFICULTY, target_ms=self.target_seal_ms,
+                                  votes_sha256=votes_digest([]), vote_total=0)
+            genesis_block.mine_block(LEGACY_DIFFICULTY)
             self.chain = [genesis_block]
             self.save_chain()
+        self.difficulty = self.next_difficulty()
+    
+    def next_difficulty(self) -> int:
+        """Difficulty the adjustment rule assigns to the next block"""
+        return required_difficulty(self.chain[-RETARGET_INTERVAL:], self.target_seal_ms)
     
     def save_chain(self):
         """Save blockchain to file"""
-        with open(self.chain_file, 'w') as f:
+        with SAVE_CHAIN_SECONDS.time(), open(self.chain_file, 'w') as f:
             json.dump([block.to_dict() for block in self.chain], f, indent=2)
     
     def get_latest_block(self) -> Block:
@@ -105,52 +273,167 @@ class Blockchain:
             self.pending_votes[poll_id] = []
         self.pending_votes[poll_id].append(vote_data)
     
-    def mine_pending_votes(self, poll_id: str) -> Optional[Block]:
-        """Mine pending votes into a new block"""
+    def mine_pending_votes(self, poll_id: str, save: bool = True) -> Optional[Block]:
+        """Mine pending votes into a new block (save=False defers save_chain to the caller)"""
         if poll_id not in self.pending_votes or not self.pending_votes[poll_id]:
             return None
         
+        difficulty = self.next_difficulty()
+        parent = self.get_latest_block()
         new_block = Block(
             index=len(self.chain),
             timestamp=time.time(),
             votes=self.pending_votes[poll_id],
-            previous_hash=self.get_latest_block().hash,
-            poll_id=poll_id
+            previous_hash=parent.hash,
+            poll_id=poll_id,
+            difficulty=difficulty,
+            target_ms=self.target_seal_ms,
+            parent_seal_ms=parent.seal_ms,
+            votes_sha256=votes_digest(self.pending_votes[poll_id]),
+            vote_total=len(self.pending_votes[poll_id])
         )
-        new_block.mine_block(self.difficulty)
+        new_block.mine_block(difficulty)
         self.chain.append(new_block)
         self.pending_votes[poll_id] = []
-        self.save_chain()
+        self.difficulty = self.next_difficulty()
+        if save:
+            self.save_chain()
         return new_block
     
-    def get_votes_for_poll(self, poll_id: str) -> List[Dict]:
-        """Get all votes for a specific poll"""
-        votes = []
+    def archive_poll(self, poll_id: str) -> int:
+        """
+        Move a closed poll's vote bodies into a compressed, read-only archive.
+        
+        Headers (hashes, linkage, difficulty) and a digest of each block's votes
+        stay in the live chain. Returns the number of blocks archived.
+        """
+        if not self.archive_dir:
+            raise ValueError("Archival is not configured")
+        
+        blocks = [block for block in self.chain if block.poll_id == poll_id and block.archive is None]
+        if not blocks:
+            return 0
+        for block in blocks:
+            if not block.hash_matches():
+                raise ValueError(f"Block {block.index} failed validation, not archiving")
+        
+        chain_dir = os.path.dirname(os.path.abspath(self.chain_file))
+        archive_dir = os.path.join(chain_dir, self.archive_dir)
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{poll_id}-{blocks[0].index}-{blocks[-1].index}.json.gz")
+        if os.path.exists(path):
+            raise ValueError(f"Archive {path} already exists")
+        
+        # Write to a temporary file first so a crash never leaves a partial archive
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            json.dump({
+                "poll_id": poll_id,
+                "blocks": [{"index": block.index, "hash": block.hash, "votes": block.votes} for block in blocks]
+            }, f)
+        os.replace(temp_path, path)
+        os.chmod(path, 0o444)
+        
+        relative_path = os.path.relpath(path, chain_dir)
+        for block in blocks:
+            block.archive = {
+                "file": relative_path,
+                "votes_sha256": votes_digest(block.votes),
+                "vote_count": len(block.votes)
+            }
+            block.votes = []
+        self.save_chain()
+        return len(blocks)
+    
+    def get_block_votes(self, block: Block) -> List[Dict]:
+        """Get a block's votes, reading them back from its archive if needed"""
+        if block.archive is None:
+            return block.votes
+        
+        path = os.path.join(os.path.dirname(os.path.abspath(self.chain_file)), block.archive["file"])
+        archive = self._archive_cache.get(path)
+        if archive is None:
+            archive = load_archive(path)
+            self._archive_cache[path] = archive
+            if len(self._archive_cache) > ARCHIVE_CACHE_SIZE:
+                self._archive_cache.popitem(last=False)
+        else:
+            self._archive_cache.move_to_end(path)
+        
+        votes = archive.get(block.index)
+        # Prefer the digest committed in the block hash over the archive record
+        expected = block.votes_sha256 or block.archive["votes_sha256"]
+        if votes is None or votes_digest(votes) != expected:
+            raise ValueError(f"Archived votes for block {block.index} do not match the chain")
+        return votes
+    
+    def get_full_block(self, block: Block) -> Block:
+        """Get a copy of a block with archived votes restored"""
+        if block.archive is None:
+            return block
+        full_block = Block.from_dict({**block.to_dict(), "votes": self.get_block_votes(block)})
+        full_block.archive = None
+        return full_block
+    
+    def iter_votes_for_poll(self, poll_id: str) -> Iterator[Tuple[Block, Dict]]:
+        """Lazily yield (block, vote) pairs for a specific poll"""
         for block in self.chain:
             if block.poll_id == poll_id:
-                votes.extend(block.votes)
-        return votes
+                for vote in self.get_block_votes(block):
+                    yield block, vote
     
-    def is_chain_valid(self) -> bool:
-        """Validate the entire blockchain"""
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
-            
-            # Check hash integrity
-            if current_block.hash != current_block.calculate_hash():
+    def get_votes_for_poll(self, poll_id: str) -> List[Dict]:
+        """Get all votes for a specific poll"""
+        return [vote for _, vote in self.iter_votes_for_poll(poll_id)]
+    
+    def is_valid_successor(self, block: Block, previous_blocks: List[Block],
+                           deep: bool = False) -> bool:
+        """
+        Check a block against the blocks it extends (parent last).
+        
+        Archived blocks whose hash commits to their votes digest are checked on
+        their headers, unless deep is set, in which case their votes are read back
+        and checked against the digest. Archived legacy blocks were hashed over
+        the raw votes, so their votes are always read back.
+        """
+        previous_block = previous_blocks[-1]
+        
+        # Check hash integrity
+        if block.archive is None:
+            if not block.hash_matches():
                 return False
-            
-            # Check chain linkage
-            if current_block.previous_hash != previous_block.hash:
+        elif block.votes_sha256 is not None and not deep:
+            if block.hash != block.calculate_hash():
                 return False
-            
-            # Check proof-of-work
-            if not current_block.hash.startswith("0" * self.difficulty):
+        else:
+            try:
+                votes = self.get_block_votes(block)
+            except ValueError:
+                return False
+            # The archive record's count feeds the chain stats, so it must match too
+            if not block.hash_matches(votes) or len(votes) != block.archive.get("vote_count"):
                 return False
         
+        # Check chain linkage
+        if block.index != previous_block.index + 1 or block.previous_hash != previous_block.hash:
+            return False
+        
+        # Check recorded difficulty and proof-of-work
+        if difficulty_error(block, previous_blocks):
+            return False
+        
         return True
     
+    def is_chain_valid(self, deep: bool = False) -> bool:
+        """Validate the entire blockchain (deep also reads back every archived block's votes)"""
+        with CHAIN_VALIDATION_SECONDS.time():
+            for i in range(1, len(self.chain)):
+                previous_blocks = self.chain[max(0, i - RETARGET_INTERVAL):i]
+                if not self.is_valid_successor(self.chain[i], previous_blocks, deep=deep):
+                    return False
+            
+            return True
+    
     def get_block_by_hash(self, block_hash: str) -> Optional[Block]:
         """Find a block by its hash"""
         for block in self.chain:
@@ -160,14 +443,17 @@ class Blockchain:
     
     def get_chain_stats(self) -> Dict[str, Any]:
         """Get blockchain statistics"""
-        total_votes = sum(len(block.votes) for block in self.chain)
+        total_votes = sum(block.vote_count() for block in self.chain)
         polls = set(block.poll_id for block in self.chain if block.poll_id != "genesis")
         
         return {
             "total_blocks": len(self.chain),
             "total_votes": total_votes,
             "total_polls": len(polls),
+            "archived_blocks": sum(1 for block in self.chain if block.archive is not None),
             "is_valid": self.is_chain_valid(),
             "latest_block_hash": self.get_latest_block().hash,
+            "difficulty": self.difficulty,
+            "target_seal_ms": self.target_seal_ms,
             "chain_file": self.chain_file
         }
@@ -2,11 +2,14 @@
 Cryptographic utilities for secure voting (Pure Python implementation)
 """
 import hashlib
+import hmac
 import json
 import base64
 import secrets
 from typing import Tuple, Dict, Any
 
+from src.metrics import PBKDF2_SECONDS
+
 
 class VoteCrypto:
     """Handles encryption and signing for votes using pure Python"""
@@ -33,7 +36,8 @@ class VoteCrypto:
         salt = secrets.token_bytes(16)
         
         # Derive actual encryption key
-        derived_key = hashlib.pbkdf2_hmac('sha256', key_material, salt, 100000)
+        with PBKDF2_SECONDS.time(operation='encrypt'):
+            derived_key = hashlib.pbkdf2_hmac('sha256', key_material, salt, 100000)
         
         # XOR encryption
         vote_bytes = vote_choice.encode('utf-8')
@@ -63,7 +67,8 @@ class VoteCrypto:
             
             # Derive decryption key
             key_material = hashlib.sha256(public_key.encode()).digest()
-            derived_key = hashlib.pbkdf2_hmac('sha256', key_material, salt, 100000)
+            with PBKDF2_SECONDS.time(operation='decrypt'):
+                derived_key = hashlib.pbkdf2_hmac('sha256', key_material, salt, 100000)
             
             # XOR decryption
             decrypted_bytes = bytes(a ^ b for a, b in zip(ciphertext, (derived_key * (len(ciphertext) // len(derived_key) + 1))[:len(ciphertext)]))
@@ -98,12 +103,28 @@ class VoteCrypto:
         receipt_data = {
             'poll_id': vote_data.get('poll_id'),
             'timestamp': vote_data.get('timestamp'),
-            'vote_hash': hashlib.sha256(
-                json.dumps(vote_data, sort_keys=True).encode('utf-8')
-            ).hexdigest()
+            'vote_hash': VoteCrypto.ballot_hash(vote_data)
         }
         return base64.b64encode(json.dumps(receipt_data).encode('utf-8')).decode('utf-8')
     
+    @staticmethod
+    def ballot_hash(vote_data: Dict[str, Any]) -> str:
+        """Hash identifying a recorded ballot (matches the receipt's vote_hash)"""
+        return hashlib.sha256(
+            json.dumps(vote_data, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+    
+    @staticmethod
+    def sign_manifest(manifest: Dict[str, Any], key: str) -> str:
+        """Create an HMAC-SHA256 signature over an export manifest"""
+        manifest_string = json.dumps(manifest, sort_keys=True).encode('utf-8')
+        return hmac.new(key.encode('utf-8'), manifest_string, hashlib.sha256).hexdigest()
+    
+    @staticmethod
+    def verify_manifest(manifest: Dict[str, Any], key: str, signature: str) -> bool:
+        """Verify an export manifest signature"""
+        return hmac.compare_digest(VoteCrypto.sign_manifest(manifest, key), signature)
+    
     @staticmethod
     def verify_receipt(receipt: str, blockchain_votes: list) -> bool:
         """Verify a receipt against blockchain"""
@@ -113,10 +134,7 @@ class VoteCrypto:
             
             # Check if vote exists in blockchain
             for vote in blockchain_votes:
-                vote_check_hash = hashlib.sha256(
-                    json.dumps(vote, sort_keys=True).encode('utf-8')
-                ).hexdigest()
-                if vote_check_hash == vote_hash:
+                if VoteCrypto.ballot_hash(vote) == vote_hash:
                     return True
             return False
         except Exception:
@@ -5,9 +5,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
+from sqlalchemy import event
 from src.models.user import db
 from src.routes.user import user_bp
-from src.routes.voting import voting_bp
+from src.routes.voting import voting_bp, replicator
+from src.routes.metrics import metrics_bp
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -15,14 +17,32 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 # Enable CORS for API
 CORS(app)
 
+# Metrics first: its request timer must start before other blueprints' hooks
+# (such as the follower write guard) can short-circuit the request
+app.register_blueprint(metrics_bp)
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(voting_bp)
 
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL',
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
+
+
+def configure_sqlite(dbapi_connection, connection_record):
+    # WAL lets readers proceed during batched imports; NORMAL sync is safe under WAL
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
 with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        event.listen(db.engine, 'connect', configure_sqlite)
     db.create_all()
 
 @app.route('/', defaults={'path': ''})
@@ -45,4 +65,7 @@ def serve(path):
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV', 'development') != 'production'
+    # Only sync from the serving process, not the debug reloader's parent
+    if replicator and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        replicator.start()
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -2,10 +2,12 @@
 Poll model for database
 """
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import json
 import uuid
 
+from src.models.poll_index import PollIndex
+
 
 class Poll:
     """Represents a voting poll"""
@@ -91,6 +93,7 @@ class PollStore:
     def __init__(self, storage_file: str = "polls.json"):
         self.storage_file = storage_file
         self.polls: Dict[str, Poll] = {}
+        self.index = PollIndex()
         self.load_polls()
     
     def load_polls(self):
@@ -105,6 +108,7 @@ class PollStore:
         except (FileNotFoundError, json.JSONDecodeError):
             self.polls = {}
             self.save_polls()
+        self.index.rebuild(list(self.polls.values()))
     
     def save_polls(self):
         """Save polls to file"""
@@ -118,6 +122,7 @@ class PollStore:
     def create_poll(self, poll: Poll) -> Poll:
         """Create a new poll"""
         self.polls[poll.poll_id] = poll
+        self.index.add(poll)
         self.save_polls()
         return poll
     
@@ -128,6 +133,7 @@ class PollStore:
     def update_poll(self, poll: Poll):
         """Update an existing poll"""
         self.polls[poll.poll_id] = poll
+        self.index.add(poll)
         self.save_polls()
     
     def get_all_polls(self) -> List[Poll]:
@@ -138,10 +144,15 @@ class PollStore:
         """Get all active polls"""
         return [poll for poll in self.polls.values() if poll.is_active()]
     
+    def search_polls(self, **filters) -> Tuple[int, List[Poll]]:
+        """Search polls by text, language, creator and status (see PollIndex.search)"""
+        return self.index.search(**filters)
+    
     def delete_poll(self, poll_id: str) -> bool:
         """Delete a poll"""
         if poll_id in self.polls:
             del self.polls[poll_id]
+            self.index.remove(poll_id)
             self.save_polls()
             return True
         return False
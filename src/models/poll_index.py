@@ -0,0 +1,173 @@
+"""
+In-memory search indexes over polls
+"""
+from bisect import bisect_left, insort
+from typing import List, Dict, Any, Optional, Set, Tuple
+import re
+import unicodedata
+
+
+# Harakat, Quranic marks and superscript alef
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]')
+ARABIC_TATWEEL = '\u0640'
+ARABIC_LETTER_VARIANTS = str.maketrans({
+    '\u0623': '\u0627',  # alef with hamza above -> alef
+    '\u0625': '\u0627',  # alef with hamza below -> alef
+    '\u0622': '\u0627',  # alef with madda -> alef
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0649': '\u064a',  # alef maksura -> yeh
+    '\u0629': '\u0647',  # teh marbuta -> heh
+    '\u0624': '\u0648',  # waw with hamza -> waw
+    '\u0626': '\u064a',  # yeh with hamza -> yeh
+})
+# Definite article, optionally with an attached conjunction/preposition (wal-, bil-, kal-, fal-, lil-, al-)
+ARABIC_PREFIXES = ('\u0648\u0627\u0644', '\u0628\u0627\u0644', '\u0643\u0627\u0644',
+                   '\u0641\u0627\u0644', '\u0644\u0644', '\u0627\u0644')
+# French elided articles/pronouns: l'économie, d'un, qu'il
+FRENCH_ELISION = re.compile(r"\b(?:qu|[cdjlmnst])['’]")
+WORD = re.compile(r'\w+')
+
+SORT_FIELDS = ('created_at', 'closes_at', 'title')
+
+
+def normalize_token(token: str) -> str:
+    """Strip a leading Arabic article from a token when enough remains"""
+    for prefix in ARABIC_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split Arabic, French or English text into normalized search tokens"""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = FRENCH_ELISION.sub(' ', text)
+    text = ARABIC_DIACRITICS.sub('', text).replace(ARABIC_TATWEEL, '')
+    text = text.translate(ARABIC_LETTER_VARIANTS)
+    # Drop Latin accents (é -> e) so "referendum" matches "référendum"
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return [normalize_token(token) for token in WORD.findall(text)]
+
+
+class PollIndex:
+    """Secondary indexes and an inverted text index over polls"""
+
+    FIELDS = ('language', 'creator', 'status')
+
+    def __init__(self):
+        self.polls: Dict[str, Any] = {}
+        self.fields: Dict[str, Dict[str, Set[str]]] = {field: {} for field in self.FIELDS}
+        self.terms: Dict[str, Set[str]] = {}
+        self.by_created: List[Tuple[float, str]] = []
+        # poll_id -> what was indexed, so updates can remove stale postings
+        self.documents: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, poll):
+        """Index a poll, replacing any previous entry for it"""
+        self.remove(poll.poll_id)
+        document = {
+            'fields': {field: getattr(poll, field) for field in self.FIELDS},
+            'terms': set(tokenize(f"{poll.title} {poll.question}")),
+            'created_at': poll.created_at
+        }
+        for field, value in document['fields'].items():
+            self.fields[field].setdefault(value, set()).add(poll.poll_id)
+        for term in document['terms']:
+            self.terms.setdefault(term, set()).add(poll.poll_id)
+        insort(self.by_created, (poll.created_at, poll.poll_id))
+        self.documents[poll.poll_id] = document
+        self.polls[poll.poll_id] = poll
+
+    def remove(self, poll_id: str):
+        """Drop a poll from every index"""
+        document = self.documents.pop(poll_id, None)
+        if not document:
+            return
+        for field, value in document['fields'].items():
+            postings = self.fields[field].get(value)
+            if postings is not None:
+                postings.discard(poll_id)
+                if not postings:
+                    del self.fields[field][value]
+        for term in document['terms']:
+            postings = self.terms.get(term)
+            if postings is not None:
+                postings.discard(poll_id)
+                if not postings:
+                    del self.terms[term]
+        position = bisect_left(self.by_created, (document['created_at'], poll_id))
+        if position < len(self.by_created) and self.by_created[position][1] == poll_id:
+            del self.by_created[position]
+        del self.polls[poll_id]
+
+    def rebuild(self, polls: List[Any]):
+        """Rebuild all indexes from scratch"""
+        self.polls = {}
+        self.fields = {field: {} for field in self.FIELDS}
+        self.terms = {}
+        self.by_created = []
+        self.documents = {}
+        for poll in polls:
+            self.add(poll)
+
+    def search(self, query: Optional[str] = None, language: Optional[str] = None,
+               creator: Optional[str] = None, status: Optional[str] = None,
+               sort: str = 'created_at', order: str = 'desc',
+               limit: Optional[int] = None, offset: int = 0) -> Tuple[int, List[Any]]:
+        """Filter, sort and paginate polls, returning (total matches, page)"""
+        candidates: Optional[Set[str]] = None
+
+        def narrow(postings: Set[str]):
+            nonlocal candidates
+            candidates = set(postings) if candidates is None else candidates & postings
+
+        terms = set(tokenize(query)) if query else set()
+        if query and not terms:
+            # No word characters (e.g. only punctuation): nothing can match
+            return 0, []
+
+        # Intersect the smallest posting lists first
+        filters = [self.fields[field].get(value, set()) if value else None
+                   for field, value in (('language', language), ('creator', creator))]
+        if status:
+            postings = self.fields['status'].get(status, set())
+            if status == 'closed':
+                # Stored status stays "active" until closed, so expired polls are filed there
+                postings = postings | self.fields['status'].get('active', set())
+            filters.append(postings)
+        filters.extend(self.terms.get(term, set()) for term in terms)
+        for postings in sorted((f for f in filters if f is not None), key=len):
+            narrow(postings)
+
+        if candidates is None:
+            # No filters: walk the creation-ordered list directly
+            ordered = [poll_id for _, poll_id in self.by_created]
+            if order == 'desc':
+                ordered.reverse()
+            if sort != 'created_at':
+                ordered = self._sorted(ordered, sort, order)
+        else:
+            ordered = self._sorted(candidates, sort, order)
+
+        end = offset + limit if limit is not None else None
+        if status not in ('active', 'closed'):
+            return len(ordered), [self.polls[poll_id] for poll_id in ordered[offset:end]]
+
+        # Match on the effective status: polls past closes_at count as closed
+        polls = [self.polls[poll_id] for poll_id in ordered
+                 if self.effective_status(self.polls[poll_id]) == status]
+        return len(polls), polls[offset:end]
+
+    @staticmethod
+    def effective_status(poll: Any) -> str:
+        """Stored status, with active polls past closes_at reported as closed"""
+        if poll.status == 'active' and not poll.is_active():
+            return 'closed'
+        return poll.status
+
+    def _sorted(self, poll_ids, sort: str, order: str) -> List[str]:
+        if sort == 'title':
+            key = lambda poll_id: (self.polls[poll_id].title.casefold(), poll_id)
+        else:
+            key = lambda poll_id: (getattr(self.polls[poll_id], sort), poll_id)
+        return sorted(poll_ids, key=key, reverse=(order == 'desc'))
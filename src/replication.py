@@ -0,0 +1,174 @@
+"""
+Leader/follower chain replication using a headers-first sync
+"""
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.blockchain import Block, Blockchain, RETARGET_INTERVAL
+
+
+class ReplicationError(Exception):
+    """Raised when the leader serves data that does not validate"""
+
+
+class ChainReplicator:
+    """Keeps a follower's blockchain in sync with a leader node"""
+
+    def __init__(self, blockchain: Blockchain, leader_url: str, interval: float = 5.0,
+                 workers: int = 4, range_size: int = 200, header_batch: int = 2000,
+                 timeout: float = 10.0):
+        self.blockchain = blockchain
+        self.leader_url = leader_url.rstrip('/')
+        self.interval = interval
+        self.workers = workers
+        self.range_size = range_size
+        self.header_batch = header_batch
+        self.timeout = timeout
+        self.last_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.leader_height = 0
+        self.blocks_synced = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET a JSON document from the leader"""
+        url = f"{self.leader_url}{path}?{urllib.parse.urlencode(params)}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def fetch_headers(self, start: int) -> List[Dict[str, Any]]:
+        """Fetch the leader's block headers from a height onward"""
+        headers = []
+        while True:
+            data = self._get('/api/blockchain/headers', {'start': start + len(headers), 'limit': self.header_batch})
+            batch = data['headers']
+            self.leader_height = data['height']
+            headers.extend(batch)
+            if not batch or start + len(headers) >= data['height']:
+                return headers
+
+    def fetch_blocks(self, start: int, end: int) -> List[Block]:
+        """Fetch full block bodies for heights [start, end)"""
+        data = self._get('/api/blockchain/blocks', {'start': start, 'end': end})
+        return [Block.from_dict(block_data) for block_data in data['blocks']]
+
+    def find_fork_point(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Find the first local height that differs from the leader.
+
+        Returns the fork height and the leader's headers from that height on,
+        so they do not have to be fetched again.
+        """
+        local = self.blockchain.chain
+        tip = len(local) - 1
+        headers = self.fetch_headers(tip)
+        if headers and headers[0]['hash'] == local[tip].hash:
+            return tip + 1, headers[1:]
+
+        # Local tip is not on the leader's chain: compare from genesis (a new
+        # follower's tip is its own genesis, so those headers already start at 0)
+        if tip > 0:
+            headers = self.fetch_headers(0)
+        for height, header in enumerate(headers):
+            if height >= len(local) or local[height].hash != header['hash']:
+                return height, headers[height:]
+        fork_point = min(len(local), len(headers))
+        return fork_point, headers[fork_point:]
+
+    @staticmethod
+    def _check_headers(headers: List[Dict[str, Any]], start: int):
+        """Check header linkage before downloading any bodies"""
+        for offset, header in enumerate(headers):
+            if header['index'] != start + offset:
+                raise ReplicationError(f"Header at height {start + offset} has index {header['index']}")
+            if offset and header['previous_hash'] != headers[offset - 1]['hash']:
+                raise ReplicationError(f"Header at height {header['index']} does not link to its parent")
+
+    def sync_once(self) -> int:
+        """Run one sync round, returning the number of blocks applied"""
+        fork_point, headers = self.find_fork_point()
+        self._check_headers(headers, fork_point)
+
+        if not headers:
+            if fork_point < len(self.blockchain.chain):
+                # Leader is shorter than us on a diverged branch: follow it
+                self.blockchain.chain = self.blockchain.chain[:fork_point]
+                self.blockchain.difficulty = self.blockchain.next_difficulty()
+                self.blockchain.save_chain()
+            return 0
+
+        ranges = [
+            (start, min(start + self.range_size, fork_point + len(headers)))
+            for start in range(fork_point, fork_point + len(headers), self.range_size)
+        ]
+
+        candidate = self.blockchain.chain[:fork_point]
+        applied = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # map() yields ranges in order, so blocks are validated incrementally
+                for blocks in pool.map(lambda r: self.fetch_blocks(*r), ranges):
+                    for block in blocks:
+                        height = fork_point + applied
+                        if applied >= len(headers) or block.index != height or block.hash != headers[applied]['hash']:
+                            raise ReplicationError(f"Block {block.index} does not match the header at height {height}")
+                        if block.index == 0:
+                            valid = block.hash_matches()
+                        else:
+                            valid = bool(candidate) and self.blockchain.is_valid_successor(
+                                block, candidate[-RETARGET_INTERVAL:]
+                            )
+                        if not valid:
+                            raise ReplicationError(f"Block {block.index} failed validation")
+                        candidate.append(block)
+                        applied += 1
+                    self.blockchain.chain = list(candidate)
+        finally:
+            # Keep whatever validated before a failure
+            if applied:
+                self.blockchain.difficulty = self.blockchain.next_difficulty()
+                self.blockchain.save_chain()
+                self.blocks_synced += applied
+        return applied
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+                self.last_sync = time.time()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start syncing in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='chain-replicator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background sync thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def status(self) -> Dict[str, Any]:
+        """Get replication status"""
+        return {
+            "role": "follower",
+            "leader_url": self.leader_url,
+            "local_height": len(self.blockchain.chain),
+            "leader_height": self.leader_height,
+            "blocks_synced": self.blocks_synced,
+            "last_sync": self.last_sync,
+            "last_error": self.last_error
+        }
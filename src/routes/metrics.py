@@ -0,0 +1,101 @@
+"""
+Metrics endpoint, request timing and opt-in slow request profiling
+"""
+from flask import Blueprint, Response, g, request
+import cProfile
+import os
+import random
+import time
+
+from src.metrics import registry, Gauge, REQUEST_SECONDS
+from src.routes.voting import blockchain
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Profile a sample of requests and keep the profiles of slow ones
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_REQUEST_MS = float(os.environ.get('PROFILE_SLOW_REQUEST_MS', 500))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+
+def _chain_file_size():
+    try:
+        return {(): os.path.getsize(blockchain.chain_file)}
+    except OSError:
+        return {}
+
+
+registry.register(Gauge(
+    'votechain_pending_votes', 'Votes waiting to be mined, per poll', ('poll_id',),
+    callback=lambda: {(poll_id,): len(votes) for poll_id, votes in list(blockchain.pending_votes.items())}))
+registry.register(Gauge(
+    'votechain_chain_height', 'Number of blocks in the chain',
+    callback=lambda: {(): len(blockchain.chain)}))
+registry.register(Gauge(
+    'votechain_chain_file_bytes', 'Size of the chain file on disk',
+    callback=_chain_file_size))
+
+
+@metrics_bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.profiler = None
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            g.profiler = profiler
+        except ValueError:
+            # Another profiler is already active in this interpreter
+            pass
+
+
+def _pop_request_timing():
+    """Take this request's timer and profiler off g so they are finished only once"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return None
+    # Label by route template, not raw path, to keep cardinality bounded
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    return started, g.pop('profiler', None), request.method, route, request.endpoint
+
+
+def _finish_request(timing, status):
+    started, profiler, method, route, endpoint = timing
+    elapsed = time.perf_counter() - started
+    REQUEST_SECONDS.observe(elapsed, method=method, route=route, status=status)
+
+    if profiler:
+        profiler.disable()
+        if elapsed * 1000 >= PROFILE_SLOW_REQUEST_MS:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint or 'unmatched'}-{int(elapsed * 1000)}ms.prof"
+            profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+
+
+@metrics_bp.after_app_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    if response.is_streamed:
+        # Streamed bodies (exports) are sent after the request context is torn
+        # down, so finish timing when the server closes the response instead
+        timing = _pop_request_timing()
+        if timing:
+            response.call_on_close(lambda: _finish_request(timing, response.status_code))
+    return response
+
+
+@metrics_bp.teardown_app_request
+def record_request(exc):
+    # Runs even when a view or another hook raised, unlike after_app_request
+    timing = _pop_request_timing()
+    if timing is None:
+        return
+    status = 500 if exc is not None else g.pop('response_status', 500)
+    _finish_request(timing, status)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose metrics in Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
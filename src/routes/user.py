@@ -1,12 +1,41 @@
+import csv
+import json
+import time
+
 from flask import Blueprint, jsonify, request
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from src.models.user import User, db
 
 user_bp = Blueprint('user', __name__)
 
+USER_FIELDS = ('id', 'username', 'email')
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 1000
+MAX_REPORTED_DUPLICATES = 100
+# Caps invalid_lines and failed_lines in the import report
+MAX_REPORTED_LINES = 100
+
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    # Keyset pagination: pass the last id seen as ?after=<id>
+    after = request.args.get('after', 0, type=int)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), MAX_PAGE_SIZE)
+    fields = [f for f in request.args.get('fields', ','.join(USER_FIELDS)).split(',') if f]
+    unknown = [f for f in fields if f not in USER_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    columns = [getattr(User, f) for f in fields]
+    if 'id' not in fields:
+        columns.append(User.id)
+    rows = db.session.query(*columns).filter(User.id > after).order_by(User.id).limit(limit).all()
+    users = [{f: getattr(row, f) for f in fields} for row in rows]
+    return jsonify({
+        'users': users,
+        'next_after': rows[-1].id if len(rows) == limit else None
+    })
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
@@ -17,6 +46,107 @@ def create_user():
     db.session.commit()
     return jsonify(user.to_dict()), 201
 
+
+def _decode_lines(stream):
+    """Yield (line_number, text) pairs, with None for lines that are not UTF-8"""
+    for line_number, raw in enumerate(stream, start=1):
+        try:
+            yield line_number, raw.decode('utf-8')
+        except UnicodeDecodeError:
+            yield line_number, None
+
+
+def _read_import_rows(stream, content_type):
+    """Yield (line_number, row) pairs from a CSV or NDJSON request body, None for unreadable rows"""
+    lines = _decode_lines(stream)
+    if 'csv' in content_type:
+        # Header is line 1; rows are one per line (no quoted newlines)
+        _, header = next(lines, (1, None))
+        if header is None:
+            return
+        fields = next(csv.reader([header]), [])
+        for line_number, line in lines:
+            if line is None:
+                yield line_number, None
+            elif line.strip():
+                yield line_number, dict(zip(fields, next(csv.reader([line]))))
+        return
+    for line_number, line in lines:
+        if line is not None and not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except (TypeError, ValueError):
+            yield line_number, None
+
+
+def _import_batch(batch, report):
+    """Insert one batch in a single transaction, skipping duplicates"""
+    usernames = {row['username'] for _, row in batch}
+    emails = {row['email'] for _, row in batch}
+    taken_usernames = {u for (u,) in db.session.query(User.username).filter(User.username.in_(usernames))}
+    taken_emails = {e for (e,) in db.session.query(User.email).filter(User.email.in_(emails))}
+
+    new_rows, new_lines = [], []
+    for line_number, row in batch:
+        if row['username'] in taken_usernames:
+            reason = 'username exists'
+        elif row['email'] in taken_emails:
+            reason = 'email exists'
+        else:
+            taken_usernames.add(row['username'])
+            taken_emails.add(row['email'])
+            new_rows.append(row)
+            new_lines.append(line_number)
+            continue
+        report['duplicates'] += 1
+        if len(report['duplicate_rows']) < MAX_REPORTED_DUPLICATES:
+            report['duplicate_rows'].append({'line': line_number, 'username': row['username'], 'reason': reason})
+
+    try:
+        if new_rows:
+            db.session.execute(insert(User), new_rows)
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent import claimed a username or email after the pre-check
+        db.session.rollback()
+        report['failed'] += len(new_rows)
+        report['failed_lines'].extend(new_lines[:MAX_REPORTED_LINES - len(report['failed_lines'])])
+        return
+    report['imported'] += len(new_rows)
+
+
+@user_bp.route('/users/import', methods=['POST'])
+def import_users():
+    # Streams CSV (username,email header) or NDJSON; commits every batch_size rows
+    batch_size = min(max(request.args.get('batch_size', 500, type=int), 1), MAX_BATCH_SIZE)
+    content_type = request.content_type or ''
+    if 'csv' not in content_type and 'ndjson' not in content_type:
+        return jsonify({'error': 'Content-Type must be text/csv or application/x-ndjson'}), 415
+
+    report = {'imported': 0, 'duplicates': 0, 'invalid': 0, 'failed': 0,
+              'duplicate_rows': [], 'invalid_lines': [], 'failed_lines': []}
+    started = time.perf_counter()
+    batch = []
+    for line_number, row in _read_import_rows(request.stream, content_type):
+        if (not isinstance(row, dict) or not isinstance(row.get('username'), str)
+                or not isinstance(row.get('email'), str) or not row['username'] or not row['email']):
+            report['invalid'] += 1
+            if len(report['invalid_lines']) < MAX_REPORTED_LINES:
+                report['invalid_lines'].append(line_number)
+            continue
+        batch.append((line_number, {'username': row['username'], 'email': row['email']}))
+        if len(batch) >= batch_size:
+            _import_batch(batch, report)
+            batch = []
+    if batch:
+        _import_batch(batch, report)
+
+    elapsed = time.perf_counter() - started
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_sec'] = round(report['imported'] / elapsed, 1) if elapsed > 0 else None
+    return jsonify(report), 200
+
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
@@ -1,22 +1,57 @@
 """
 Voting API routes
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from datetime import datetime
+import csv
+import hashlib
+import io
+import json
+import os
 import time
+from typing import Optional
 
 from src.models.poll import Poll, PollStore
+from src.models.poll_index import SORT_FIELDS
 from src.blockchain import Blockchain
 from src.crypto_utils import VoteCrypto, VoterRegistry
+from src.replication import ChainReplicator
+from src.metrics import VOTES_ACCEPTED, VOTES_REJECTED, DOUBLE_VOTE_ATTEMPTS
 
 voting_bp = Blueprint('voting', __name__, url_prefix='/api')
 
 # Initialize components
-poll_store = PollStore('polls.json')
-blockchain = Blockchain('blockchain.json')
+poll_store = PollStore(os.environ.get('POLLS_FILE', 'polls.json'))
+blockchain = Blockchain(
+    os.environ.get('CHAIN_FILE', 'blockchain.json'),
+    target_seal_ms=float(os.environ.get('MINING_TARGET_MS', 200)),
+    archive_dir=os.environ.get('ARCHIVE_DIR')
+)
 voter_registry = VoterRegistry()
 crypto = VoteCrypto()
 
+# Follower nodes replicate the chain from a leader and only serve reads
+replicator = ChainReplicator(
+    blockchain,
+    os.environ['LEADER_URL'],
+    interval=float(os.environ.get('SYNC_INTERVAL', 5))
+) if os.environ.get('LEADER_URL') else None
+
+READ_ONLY_ENDPOINTS = {'voting.verify_receipt', 'voting.verify_export_manifest'}
+# HEAD and CORS preflight requests never write
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@voting_bp.before_app_request
+def reject_writes_on_follower():
+    """Followers are read-only replicas: reject writes to every blueprint"""
+    if (replicator and request.method not in READ_ONLY_METHODS
+            and request.endpoint not in READ_ONLY_ENDPOINTS):
+        return jsonify({
+            'error': 'This node is a read-only replica',
+            'leader_url': replicator.leader_url
+        }), 403
+
 
 @voting_bp.route('/polls', methods=['POST'])
 def create_poll():
@@ -61,17 +96,33 @@ def create_poll():
 
 @voting_bp.route('/polls', methods=['GET'])
 def get_polls():
-    """Get all polls or active polls"""
+    """Search polls with optional text, language, creator and status filters"""
     try:
         active_only = request.args.get('active', 'false').lower() == 'true'
-        
-        if active_only:
-            polls = poll_store.get_active_polls()
-        else:
-            polls = poll_store.get_all_polls()
+        sort = request.args.get('sort', 'created_at')
+        order = request.args.get('order', 'desc')
+        limit = request.args.get('limit', 100, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        
+        if sort not in SORT_FIELDS:
+            return jsonify({'error': f"Sort must be one of: {', '.join(SORT_FIELDS)}"}), 400
+        if order not in ('asc', 'desc'):
+            return jsonify({'error': 'Order must be asc or desc'}), 400
+        
+        total, polls = poll_store.search_polls(
+            query=request.args.get('q'),
+            language=request.args.get('language'),
+            creator=request.args.get('creator'),
+            status='active' if active_only else request.args.get('status'),
+            sort=sort,
+            order=order,
+            limit=min(max(limit, 1), 500),
+            offset=max(offset, 0)
+        )
         
         return jsonify({
             'success': True,
+            'total': total,
             'polls': [poll.to_public_dict() for poll in polls]
         }), 200
         
@@ -116,19 +167,23 @@ def submit_vote():
         vote_choice = data.get('vote_choice')
         
         if not all([poll_id, voter_identifier, vote_choice]):
+            VOTES_REJECTED.inc(reason='missing_fields')
             return jsonify({'error': 'Missing required fields'}), 400
         
         # Get poll
         poll = poll_store.get_poll(poll_id)
         if not poll:
+            VOTES_REJECTED.inc(reason='poll_not_found')
             return jsonify({'error': 'Poll not found'}), 404
         
         # Check if poll is active
         if not poll.is_active():
+            VOTES_REJECTED.inc(reason='poll_closed')
             return jsonify({'error': 'Poll is closed'}), 400
         
         # Validate vote choice
         if vote_choice not in poll.options:
+            VOTES_REJECTED.inc(reason='invalid_choice')
             return jsonify({'error': 'Invalid vote choice'}), 400
         
         # Generate voter token
@@ -136,6 +191,8 @@ def submit_vote():
         
         # Check if already voted
         if voter_registry.has_voted(poll_id, voter_token):
+            DOUBLE_VOTE_ATTEMPTS.inc()
+            VOTES_REJECTED.inc(reason='double_vote')
             return jsonify({'error': 'You have already voted in this poll'}), 400
         
         # Encrypt vote
@@ -165,6 +222,7 @@ def submit_vote():
         
         # Generate receipt
         receipt = crypto.generate_receipt(vote_data)
+        VOTES_ACCEPTED.inc()
         
         return jsonify({
             'success': True,
@@ -174,6 +232,7 @@ def submit_vote():
         }), 201
         
     except Exception as e:
+        VOTES_REJECTED.inc(reason='error')
         return jsonify({'error': str(e)}), 500
 
 
@@ -216,6 +275,13 @@ def close_poll(poll_id):
         poll.set_results(results)
         poll_store.update_poll(poll)
         
+        # Move the tallied poll's vote bodies out of the live chain
+        if blockchain.archive_dir:
+            try:
+                blockchain.archive_poll(poll_id)
+            except Exception as e:
+                print(f"Error archiving poll: {e}")
+        
         return jsonify({
             'success': True,
             'message': 'Poll closed successfully',
@@ -227,6 +293,165 @@ def close_poll(poll_id):
         return jsonify({'error': str(e)}), 500
 
 
+EXPORT_FIELDS = ['ballot_hash', 'block_index', 'timestamp', 'encrypted_vote', 'choice']
+
+
+def iter_export_rows(poll: Poll):
+    """Lazily build export rows for a poll's mined ballots"""
+    decrypt = poll.status == 'closed'
+    for block, vote_data in blockchain.iter_votes_for_poll(poll.poll_id):
+        choice = None
+        if decrypt:
+            try:
+                choice = crypto.decrypt_vote(vote_data['encrypted_vote'], poll.private_key)
+            except Exception:
+                choice = None
+        yield {
+            'ballot_hash': crypto.ballot_hash(vote_data),
+            'block_index': block.index,
+            'timestamp': vote_data.get('timestamp'),
+            'encrypted_vote': vote_data['encrypted_vote'],
+            'choice': choice
+        }
+
+
+def iter_ndjson(rows):
+    # The status is already sent once streaming starts, so the last line tells
+    # the client whether the export completed and how many rows to expect
+    count = 0
+    try:
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+            count += 1
+    except Exception as e:
+        yield json.dumps({'summary': {'rows': count, 'complete': False, 'error': str(e)}}) + '\n'
+        return
+    yield json.dumps({'summary': {'rows': count, 'complete': True}}) + '\n'
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    # Every line stays a ballot row: clients check completeness by comparing
+    # the row count with the manifest's total_ballots
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Flush the header for polls without ballots
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+def manifest_signing_key() -> Optional[str]:
+    """Dedicated server key for export manifests, None when not configured"""
+    return os.environ.get('MANIFEST_SIGNING_KEY') or None
+
+
+@voting_bp.route('/polls/<poll_id>/export', methods=['GET'])
+def export_poll(poll_id):
+    """Stream a poll's anonymized ballots as NDJSON or CSV"""
+    try:
+        poll = poll_store.get_poll(poll_id)
+        
+        if not poll:
+            return jsonify({'error': 'Poll not found'}), 404
+        
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format == 'ndjson':
+            body, mimetype = iter_ndjson(iter_export_rows(poll)), 'application/x-ndjson'
+        elif export_format == 'csv':
+            body, mimetype = iter_csv(iter_export_rows(poll)), 'text/csv'
+        else:
+            return jsonify({'error': 'Format must be ndjson or csv'}), 400
+        
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename=poll-{poll_id}.{export_format}'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@voting_bp.route('/polls/<poll_id>/export/manifest', methods=['GET'])
+def export_manifest(poll_id):
+    """Get a signed manifest with totals for a poll export"""
+    try:
+        poll = poll_store.get_poll(poll_id)
+        
+        if not poll:
+            return jsonify({'error': 'Poll not found'}), 404
+        
+        # Single pass over the chain; only hashes are kept
+        ballots_digest = hashlib.sha256()
+        total_ballots = 0
+        total_blocks = 0
+        first_block = last_block = None
+        for block, vote_data in blockchain.iter_votes_for_poll(poll_id):
+            ballots_digest.update((crypto.ballot_hash(vote_data) + '\n').encode('utf-8'))
+            total_ballots += 1
+            if block.index != last_block:
+                total_blocks += 1
+                first_block = block.index if first_block is None else first_block
+                last_block = block.index
+        
+        signing_key = manifest_signing_key()
+        if not signing_key:
+            return jsonify({'error': 'Manifest signing is not configured (set MANIFEST_SIGNING_KEY)'}), 503
+        
+        manifest = {
+            'poll_id': poll_id,
+            'status': poll.status,
+            'total_ballots': total_ballots,
+            'total_blocks': total_blocks,
+            'first_block': first_block,
+            'last_block': last_block,
+            'ballots_sha256': ballots_digest.hexdigest(),
+            'results': poll.results if poll.status == 'closed' else None,
+            'chain_tip': blockchain.get_latest_block().hash,
+            'generated_at': time.time()
+        }
+        
+        return jsonify({
+            'success': True,
+            'manifest': manifest,
+            'signature': crypto.sign_manifest(manifest, signing_key)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@voting_bp.route('/polls/<poll_id>/export/manifest/verify', methods=['POST'])
+def verify_export_manifest(poll_id):
+    """Check that a manifest was signed by this server and is unmodified"""
+    try:
+        data = request.json or {}
+        manifest = data.get('manifest')
+        signature = data.get('signature')
+        
+        if not isinstance(manifest, dict) or not isinstance(signature, str):
+            return jsonify({'error': 'Manifest and signature required'}), 400
+        
+        signing_key = manifest_signing_key()
+        if not signing_key:
+            return jsonify({'error': 'Manifest signing is not configured (set MANIFEST_SIGNING_KEY)'}), 503
+        
+        is_valid = manifest.get('poll_id') == poll_id and crypto.verify_manifest(
+            manifest, signing_key, signature
+        )
+        
+        return jsonify({
+            'success': True,
+            'valid': is_valid
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @voting_bp.route('/verify', methods=['POST'])
 def verify_receipt():
     """Verify a vote receipt"""
@@ -239,7 +464,11 @@ def verify_receipt():
             return jsonify({'error': 'Receipt and poll_id required'}), 400
         
         # Get votes from blockchain
-        votes = blockchain.get_votes_for_poll(poll_id)
+        try:
+            votes = blockchain.get_votes_for_poll(poll_id)
+        except ValueError as e:
+            # Archived votes are missing or do not match the chain
+            return jsonify({'error': f'Votes for this poll cannot be verified: {e}'}), 503
         
         # Verify receipt
         is_valid = crypto.verify_receipt(receipt, votes)
@@ -269,12 +498,57 @@ def blockchain_stats():
 
 @voting_bp.route('/blockchain/blocks', methods=['GET'])
 def get_blocks():
-    """Get all blocks"""
+    """Get all blocks, or the blocks in heights [start, end)"""
     try:
-        blocks = [block.to_dict() for block in blockchain.chain]
+        chain = blockchain.chain
+        start = request.args.get('start', 0, type=int)
+        end = request.args.get('end', len(chain), type=int)
+        blocks = [blockchain.get_full_block(block).to_dict() for block in chain[max(start, 0):max(end, 0)]]
         return jsonify({
             'success': True,
             'blocks': blocks
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@voting_bp.route('/blockchain/headers', methods=['GET'])
+def get_headers():
+    """Get block headers (without vote bodies) for headers-first sync"""
+    try:
+        chain = blockchain.chain
+        start = max(request.args.get('start', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', 2000, type=int), 1), 10000)
+        headers = [
+            {
+                'index': block.index,
+                'hash': block.hash,
+                'previous_hash': block.previous_hash,
+                'poll_id': block.poll_id,
+                'timestamp': block.timestamp
+            }
+            for block in chain[start:start + limit]
+        ]
+        return jsonify({
+            'success': True,
+            'height': len(chain),
+            'headers': headers
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@voting_bp.route('/replication/status', methods=['GET'])
+def replication_status():
+    """Get this node's replication role and sync progress"""
+    try:
+        status = replicator.status() if replicator else {
+            'role': 'leader',
+            'local_height': len(blockchain.chain)
+        }
+        return jsonify({
+            'success': True,
+            'status': status
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500